@@ -0,0 +1,126 @@
+"""Numba variant of the benchmark harness (token-information kernel only).
+
+Tokenization and template masking stay in Python (Numba does not accelerate
+string work); the corpus is pre-tokenized into a ragged ``int32`` token-id
+array (``token_ids`` + ``offsets``) and a JIT-compiled kernel performs the
+observe + score counting loop. Only the token self-information component is
+modelled (no templates, level bonus, decay or pruning), so numbers are an
+upper bound for the numeric part of ``InfoModel`` rather than a drop-in
+replacement.
+
+Requires ``numba`` and ``numpy`` (not project dependencies):
+
+    pip install numba numpy
+    python bench/benchmark_numba.py --lines 50000 --warm 5000 --measure 20000
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+import time
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+    from numba import njit  # type: ignore
+except Exception as exc:  # noqa: BLE001 - optional dependency
+    print(f"benchmark_numba requires numba + numpy: {exc}", file=sys.stderr)
+    raise SystemExit(2)
+
+from elaborlog.config import ScoringConfig
+from elaborlog.parsers import parse_line
+from elaborlog.tokenize import tokens
+
+try:  # run from repo root (python bench/benchmark_numba.py) or as a module
+    from bench.benchmark import synthetic_lines
+except Exception:  # noqa: BLE001
+    from benchmark import synthetic_lines  # type: ignore
+
+
+def encode_corpus(lines: Sequence[str], cfg: ScoringConfig) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Tokenize lines in Python and return (token_ids, offsets, vocab_size)."""
+    vocab: Dict[str, int] = {}
+    flat: List[int] = []
+    offsets = [0]
+    for line in lines:
+        _, _, msg = parse_line(line)
+        toks = tokens(
+            msg,
+            include_bigrams=cfg.include_bigrams,
+            split_camel=cfg.split_camel,
+            split_dot=cfg.split_dot,
+        )[: cfg.max_tokens_per_line]
+        for tok in toks:
+            idx = vocab.get(tok)
+            if idx is None:
+                idx = len(vocab)
+                vocab[tok] = idx
+            flat.append(idx)
+        offsets.append(len(flat))
+    return np.asarray(flat, dtype=np.int32), np.asarray(offsets, dtype=np.int32), len(vocab)
+
+
+@njit(cache=True)
+def observe_score(token_ids, offsets, counts, seen, total, vocab, alpha, start, stop):  # type: ignore[no-untyped-def]
+    """Observe lines [start, stop) then score each; returns (scores, total, vocab).
+
+    ``counts`` holds per-id counts, ``seen`` flags ids already in the vocabulary
+    (mirrors ``len(InfoModel.token_counts)`` for the smoothing denominator).
+    """
+    out = np.zeros(stop - start, dtype=np.float64)
+    for line in range(start, stop):
+        lo = offsets[line]
+        hi = offsets[line + 1]
+        for j in range(lo, hi):
+            t = token_ids[j]
+            if not seen[t]:
+                seen[t] = True
+                vocab += 1
+            counts[t] += 1.0
+            total += 1.0
+        n = hi - lo
+        if n == 0:
+            continue
+        denom = total + alpha * max(1, vocab)
+        acc = 0.0
+        for j in range(lo, hi):
+            prob = (counts[token_ids[j]] + alpha) / denom
+            acc += -math.log2(max(prob, 1e-12))
+        out[line - start] = acc / n
+    return out, total, vocab
+
+
+def run(lines: Sequence[str], warm: int, measure: int) -> float:
+    cfg = ScoringConfig()
+    token_ids, offsets, vocab_size = encode_corpus(lines[: warm + measure], cfg)
+    counts = np.zeros(vocab_size, dtype=np.float64)
+    seen = np.zeros(vocab_size, dtype=np.bool_)
+    # Trigger compilation outside the timed region (cached on disk afterwards)
+    observe_score(token_ids, offsets, counts.copy(), seen.copy(), 0.0, 0, cfg.alpha, 0, min(1, warm + measure))
+    _, total, vocab = observe_score(token_ids, offsets, counts, seen, 0.0, 0, cfg.alpha, 0, warm)
+    start = time.perf_counter_ns()
+    scores, total, vocab = observe_score(
+        token_ids, offsets, counts, seen, total, vocab, cfg.alpha, warm, warm + measure
+    )
+    elapsed = (time.perf_counter_ns() - start) * 1e-9
+    counted = len(scores)
+    lps = counted / elapsed if elapsed else float("inf")
+    print(f"[numba kernel] Processed {counted} lines in {elapsed:.4f}s -> {lps:,.0f} lines/sec")
+    print(f"Unique tokens: {vocab}  (tokenization excluded from timing)")
+    return lps
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark a Numba observe+score token kernel")
+    ap.add_argument("--lines", type=int, default=20000, help="Synthetic lines to generate")
+    ap.add_argument("--warm", type=int, default=2000, help="Warm-up lines (not timed)")
+    ap.add_argument("--measure", type=int, default=10000, help="Lines to measure")
+    args = ap.parse_args()
+    lines = synthetic_lines(max(args.lines, args.warm + args.measure))
+    run(lines, args.warm, args.measure)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual use
+    raise SystemExit(main())
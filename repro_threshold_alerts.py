@@ -1,41 +1,34 @@
-import subprocess, sys, tempfile, time, os, json
+import contextlib, io, json, os, sys, tempfile, time
+
+from elaborlog.cli import build_parser
+
+LINES = ['ERROR something bad happened code=42 user=7'] + [
+    f'ERROR something bad happened code={40+i} user={7+i}' for i in range(8)
+]
 
 def main():
-    td = tempfile.TemporaryDirectory()
-    log = os.path.join(td.name, 'a.log')
-    with open(log,'w',encoding='utf-8') as f:
-        f.write('ERROR something bad happened code=42 user=7\n')
-    jsonl = os.path.join(td.name,'alerts.jsonl')
-    proc = subprocess.Popen([
-        sys.executable,'-m','elaborlog.cli','tail',log,'--threshold','0.0','--burn-in','0','--jsonl',jsonl
-    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    try:
-        time.sleep(0.3)
-        for i in range(8):
-            with open(log,'a',encoding='utf-8') as f:
-                f.write(f'ERROR something bad happened code={40+i} user={7+i}\n')
-            time.sleep(0.05)
-        deadline=time.time()+3
-        while time.time()<deadline:
-            if os.path.exists(jsonl) and os.path.getsize(jsonl)>0:
-                break
-            time.sleep(0.1)
-        proc.terminate()
-        try:
-            proc.wait(timeout=3)
-        except subprocess.TimeoutExpired:
-            proc.kill()
-    finally:
-        if proc.poll() is None:
-            proc.kill()
-    print('jsonl exists', os.path.exists(jsonl), 'size', os.path.getsize(jsonl) if os.path.exists(jsonl) else -1)
-    if os.path.exists(jsonl):
-        content = open(jsonl,'r',encoding='utf-8').read().strip().splitlines()
-        print('lines written:', len(content))
-        for line in content[:3]:
-            print('sample line:', line[:160])
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as td:
+        log = os.path.join(td, 'a.log')
+        with open(log, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(LINES) + '\n')
+        jsonl = os.path.join(td, 'alerts.jsonl')
+        # Run tail in-process: --no-follow reads the file once and returns at EOF,
+        # so there is no child interpreter to spawn or JSONL file to poll.
+        args = build_parser().parse_args([
+            'tail', log, '--threshold', '0.0', '--burn-in', '0', '--jsonl', jsonl, '--no-follow', '--no-color'
+        ])
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            args.func(args)
+        content = open(jsonl, 'r', encoding='utf-8').read().strip().splitlines() if os.path.exists(jsonl) else []
+    print('lines written:', len(content))
+    for line in content[:3]:
+        print('sample line:', line[:160])
+        json.loads(line)
     print('STDERR:')
-    print(proc.stderr.read())
+    print(err.getvalue())
+    print(f'elapsed {time.perf_counter() - started:.3f}s', file=sys.stderr)
 
 if __name__ == '__main__':
     main()
@@ -2,40 +2,52 @@
 """Add SPDX license identifiers to Python source files lacking them.
 
 Dry-run by default; pass --write to modify files in place.
-Skips files in build, dist, .venv, and egg-info directories.
+Skips build, dist, .venv, .git, __pycache__ and egg-info directories without
+descending into them, and leaves symlinked files alone (their target is
+either scanned directly or lives outside the tree).
 """
 from __future__ import annotations
 import argparse
 import os
+import shutil
 import sys
 from pathlib import Path
 
 SPDX_LINE = "# SPDX-License-Identifier: Apache-2.0\n"
+HEAD_BYTES = 256
 
-EXCLUDE_DIRS = {"build", "dist", ".venv", "__pycache__"}
+EXCLUDE_DIRS = {"build", "dist", ".venv", "__pycache__", ".git"}
 
 
-def wants(path: Path) -> bool:
-    if path.suffix != ".py":
-        return False
-    parts = set(path.parts)
-    if parts & EXCLUDE_DIRS:
-        return False
-    if any(p.endswith(".egg-info") for p in parts):  # crude but fine for helper
-        return False
-    return True
+def _keep_dir(name: str) -> bool:
+    return name not in EXCLUDE_DIRS and not name.endswith(".egg-info")
 
 
 def process(path: Path, write: bool) -> bool:
+    # Replacing a symlink would turn it into a regular file
+    if path.is_symlink():
+        return False
+    # Only the first few lines can carry the header; don't read whole files
     try:
-        text = path.read_text(encoding="utf-8")
-    except Exception:
+        with path.open("rb") as fh:
+            head = fh.read(HEAD_BYTES)
+    except OSError:
         return False
-    if "SPDX-License-Identifier" in text.splitlines()[:3]:
+    if any(b"SPDX-License-Identifier" in line for line in head.split(b"\n", 3)[:3]):
         return False
     if write:
-        new = SPDX_LINE + text
-        path.write_text(new, encoding="utf-8")
+        # Stream the original after the header into a temp file, then swap
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            with path.open("rb") as src, tmp.open("wb") as dst:
+                dst.write(SPDX_LINE.encode("utf-8"))
+                shutil.copyfileobj(src, dst, 1 << 16)
+            # Keep the executable bit etc. of the original
+            shutil.copymode(path, tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
     return True
 
 
@@ -47,12 +59,15 @@ def main() -> int:
     root = Path(args.root)
     added = 0
     scanned = 0
-    for p in root.rglob("*.py"):
-        if not wants(p):
-            continue
-        scanned += 1
-        if process(p, args.write):
-            added += 1
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Prune in place so excluded trees (e.g. a large .venv) are never walked
+        dirnames[:] = [d for d in dirnames if _keep_dir(d)]
+        for fn in filenames:
+            if not fn.endswith(".py"):
+                continue
+            scanned += 1
+            if process(Path(dirpath) / fn, args.write):
+                added += 1
     print(f"Scanned {scanned} python files; headers added to {added} (write={args.write})")
     return 0
 
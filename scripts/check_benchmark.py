@@ -1,7 +1,8 @@
 """Benchmark regression guard.
 
 Reads the current benchmark result JSON (produced by benchmark job)
-and compares lines/sec against baseline. Fails (non-zero exit) if
+and compares lines/sec (the ``lps_p50`` median when the run used
+``--repeats``) against baseline. Fails (non-zero exit) if
 performance regresses beyond allowed tolerance.
 
 Usage:
@@ -9,7 +10,8 @@ Usage:
       --baseline bench/baseline.json --min-ratio 0.90
 
 CI Strategy:
-  1. Run benchmark to produce bench-result.json (ensure JSON output).
+  1. Run benchmark to produce bench-result.json; the producer writes it
+     directly (`python bench/benchmark.py ... --repeats 5 --json bench-result.json`).
   2. Run this script with chosen --min-ratio (e.g. 0.90 = allow <=10% drop).
   3. If regression detected, exit code 2.
 
@@ -50,13 +52,15 @@ def main(argv: list[str]) -> int:
     baseline = load_json(args.baseline)
 
     def extract(d: Dict[str, Any], label: str) -> float:
-        if "lines_per_sec" not in d:
+        # Prefer the median over repeats when the producer recorded one
+        key = "lps_p50" if "lps_p50" in d else "lines_per_sec"
+        if key not in d:
             print(f"ERROR: missing 'lines_per_sec' in {label} file", file=sys.stderr)
             sys.exit(1)
         try:
-            return float(d["lines_per_sec"])
+            return float(d[key])
         except (TypeError, ValueError):
-            print(f"ERROR: 'lines_per_sec' in {label} not numeric", file=sys.stderr)
+            print(f"ERROR: '{key}' in {label} not numeric", file=sys.stderr)
             sys.exit(1)
 
     cur = extract(current, "current")
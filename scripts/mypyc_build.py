@@ -0,0 +1,84 @@
+"""Compile the scoring hot path with mypyc (optional, for benchmarking).
+
+Builds C extensions for ``elaborlog.score`` and ``elaborlog.parsers`` in
+place under ``src/elaborlog``. Python prefers the compiled ``.so``/``.pyd``
+over the ``.py`` source, so ``bench/benchmark.py`` (and the CLI) pick the
+compiled form up whenever ``elaborlog`` is imported from ``src`` (editable
+install or ``PYTHONPATH=src``; a regular ``pip install .`` copy in
+site-packages stays pure Python); run ``--clean`` to go back to pure Python.
+
+Usage:
+  pip install mypy setuptools
+  python scripts/mypyc_build.py          # build in place
+  python scripts/mypyc_build.py --clean  # remove compiled artifacts
+
+The modules are unchanged; mypyc relies on the existing strict annotations
+(``mypy src`` must pass). Tokenization and masking live in ``tokenize.py`` /
+``templates.py`` and stay interpreted, so expect a modest end-to-end gain.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULES = ["src/elaborlog/score.py", "src/elaborlog/parsers.py"]
+
+
+def compiled_artifacts() -> List[Path]:
+    """Extension files produced by a previous in-place build."""
+    found: List[Path] = []
+    for src in MODULES:
+        path = ROOT / src
+        found.extend(p for p in path.parent.glob(path.stem + ".*") if p.suffix in (".so", ".pyd"))
+    # mypyc's shared runtime library lands next to the package root
+    for base in (ROOT / "src", ROOT):
+        found.extend(p for p in base.glob("*__mypyc.*") if p.suffix in (".so", ".pyd"))
+    return found
+
+
+def clean() -> int:
+    for path in compiled_artifacts():
+        path.unlink()
+        print(f"removed {path.relative_to(ROOT)}")
+    shutil.rmtree(ROOT / "build", ignore_errors=True)
+    return 0
+
+
+def build(opt_level: str) -> int:
+    try:
+        from mypyc.build import mypycify
+        from setuptools import setup
+    except ImportError as exc:
+        print(f"mypyc build requires mypy and setuptools: {exc}", file=sys.stderr)
+        return 2
+    # Build from a scratch directory so setuptools does not pick up (and
+    # re-validate) the project's own pyproject.toml metadata.
+    work = ROOT / "build" / "mypyc"
+    work.mkdir(parents=True, exist_ok=True)
+    os.chdir(work)
+    setup(
+        name="elaborlog-mypyc",
+        package_dir={"": str(ROOT / "src")},
+        ext_modules=mypycify([str(ROOT / m) for m in MODULES], opt_level=opt_level),
+        script_args=["build_ext", "--inplace"],
+    )
+    for path in compiled_artifacts():
+        print(f"built {path.relative_to(ROOT)}")
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Compile elaborlog.score/parsers with mypyc")
+    ap.add_argument("--clean", action="store_true", help="Remove compiled artifacts instead of building")
+    ap.add_argument("--opt-level", default="3", choices=["0", "1", "2", "3"], help="C compiler optimisation level")
+    args = ap.parse_args()
+    return clean() if args.clean else build(args.opt_level)
+
+
+if __name__ == "__main__":  # pragma: no cover - manual use
+    raise SystemExit(main())
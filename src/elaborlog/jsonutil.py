@@ -0,0 +1,49 @@
+"""JSON encoding/decoding helpers with an optional orjson fast path.
+
+``orjson`` (``pip install "elaborlog[fast]"``) is a C encoder/decoder that is
+several times faster than the stdlib for the rank/explain JSON documents and
+alert JSONL lines. Output is UTF-8 bytes either way; the stdlib fallback keeps the
+historical formatting (``ensure_ascii`` escapes, ``indent=2``), so callers
+never need to know which encoder is active.
+"""
+from __future__ import annotations
+
+import importlib
+import json
+from typing import Any
+
+_orjson: Any
+try:  # optional dependency; resolved dynamically so type checking never needs it
+    _orjson = importlib.import_module("orjson")
+except Exception:  # noqa: BLE001
+    _orjson = None
+
+HAVE_ORJSON = _orjson is not None
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Encode ``obj`` to UTF-8 JSON bytes (two-space indent when ``indent``)."""
+    if _orjson is not None:
+        return _orjson.dumps(obj, option=_orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Encode ``obj`` as one compact JSON line terminated by ``\\n``."""
+    if _orjson is not None:
+        return _orjson.dumps(obj, option=_orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj) + "\n").encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Decode one JSON document from UTF-8 ``bytes``.
+
+    Errors are ``ValueError`` subclasses with either backend (invalid UTF-8
+    included).
+    """
+    if _orjson is not None:
+        return _orjson.loads(data)
+    return json.loads(data)
+
+
+__all__ = ["HAVE_ORJSON", "dumps", "dumps_line", "loads"]
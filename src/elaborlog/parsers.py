@@ -5,6 +5,8 @@ from typing import Optional, Tuple
 
 # Very lightweight parser: try JSON logs first; fallback to naive parse
 _LEVELS = {"CRITICAL", "ERROR", "WARN", "WARNING", "INFO", "DEBUG", "TRACE"}
+_LEVEL_RE = re.compile(r"\b(CRITICAL|ERROR|WARN|WARNING|INFO|DEBUG|TRACE)\b")
+_TS_RE = re.compile(r"\d{4}-\d{2}-\d{2}T?\s?\d{2}:\d{2}:\d{2}")
 
 
 def parse_line(line: str) -> Tuple[Optional[str], Optional[str], str]:
@@ -29,11 +31,11 @@ def parse_line(line: str) -> Tuple[Optional[str], Optional[str], str]:
             get_logger().warning("JSON parse failed: %s", exc)
 
     # Naive parse: [LEVEL] or LEVEL:
-    match = re.search(r"\b(CRITICAL|ERROR|WARN|WARNING|INFO|DEBUG|TRACE)\b", line)
+    match = _LEVEL_RE.search(line)
     level = match.group(1) if match else None
 
     # Timestamp heuristic (ISO-like)
-    ts_match = re.search(r"\d{4}-\d{2}-\d{2}T?\s?\d{2}:\d{2}:\d{2}", line)
+    ts_match = _TS_RE.search(line)
     ts = ts_match.group(0) if ts_match else None
 
     return ts, level, line
@@ -3,11 +3,21 @@
 This keeps 5 markers for a single target quantile q. Memory O(1), update O(1).
 Suitable for high-percentile estimates (q >= ~0.9). For small sample sizes (<5) it
 falls back to exact sample quantiles.
+
+``WindowQuantile`` is the exact alternative for a rolling window of the last N
+samples: it keeps the window sorted incrementally so a quantile lookup is an
+index instead of a sort. ``SubWindowQuantile`` approximates the same rolling
+quantiles for very large windows by averaging per-sub-window quantiles, and
+``AdaptiveQuantile`` picks the window length per query from a power-of-two
+ladder of exact windows.
 """
 
 from __future__ import annotations
+import math
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
 from dataclasses import dataclass, field
-from typing import List
+from typing import Deque, Dict, Iterable, List, Tuple
 
 
 @dataclass
@@ -106,4 +116,200 @@ class P2Quantile:
         return h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
 
 
-__all__ = ["P2Quantile"]
+class WindowQuantile:
+    """Exact quantiles over the most recent ``maxlen`` samples.
+
+    Samples are kept twice: a FIFO deque for eviction order and a sorted list
+    maintained with ``bisect``. Each update is O(log W) comparisons plus a
+    C-level list shift, and ``value(q)`` is O(1) with the same linear
+    interpolation as sorting the window (``cli.compute_quantile``).
+    """
+
+    def __init__(self, maxlen: int) -> None:
+        if maxlen < 1:  # pragma: no cover - guard
+            raise ValueError("maxlen must be >= 1")
+        self.maxlen = maxlen
+        self._fifo: Deque[float] = deque()
+        self._sorted: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def update(self, x: float) -> None:
+        """Add one sample, evicting the oldest once the window is full."""
+        fifo = self._fifo
+        data = self._sorted
+        if len(fifo) == self.maxlen:
+            old = fifo.popleft()
+            del data[bisect_left(data, old)]
+        fifo.append(x)
+        insort(data, x)
+
+    def value(self, q: float) -> float:
+        """Return the interpolated q-quantile of the window (inf when empty)."""
+        return _sorted_quantile(self._sorted, q)
+
+    def cdf(self, x: float) -> float:
+        """Fraction of window samples <= ``x`` (0.0 when empty)."""
+        data = self._sorted
+        return bisect_right(data, x) / len(data) if data else 0.0
+
+
+class AdaptiveQuantile:
+    """Rolling quantile whose window is chosen per query from a log2 ladder.
+
+    Exact windows of 1, 2, 4, ... samples (capped by ``maxlen``, which is
+    always included) are maintained side by side. For a query ``value(q)``
+    each full window ``k`` is scored by ``psi(k) + phi(k)``:
+
+    * ``psi(k) = sqrt(log(2 L / delta) / (2 k))`` is the DKW-style sampling
+      error of a k-sample quantile (L = number of windows),
+    * ``phi(k)`` estimates drift: the largest excess miscoverage of window k's
+      quantile on any shorter window ``j``, ``|F_j(q_k) - q| - psi(j)``.
+
+    The window with the smallest total is used, so a stationary stream picks
+    the longest window and a level shift falls back to the recent samples
+    until the longer windows catch up. Updates are O(L log maxlen), queries
+    O(L^2 log maxlen).
+    """
+
+    def __init__(self, maxlen: int, delta: float = 0.1) -> None:
+        if maxlen < 1:  # pragma: no cover - guard
+            raise ValueError("maxlen must be >= 1")
+        if not (0 < delta < 1):  # pragma: no cover - guard
+            raise ValueError("delta must be in (0,1)")
+        self.maxlen = maxlen
+        sizes: List[int] = []
+        k = 1
+        while k < maxlen:
+            sizes.append(k)
+            k *= 2
+        sizes.append(maxlen)
+        self._levels = [WindowQuantile(k) for k in sizes]
+        log_term = math.log(2 * len(sizes) / delta)
+        self._psi = [math.sqrt(log_term / (2 * k)) for k in sizes]
+        self._n = 0
+
+    def __len__(self) -> int:
+        return len(self._levels[-1])
+
+    def update(self, x: float) -> None:
+        """Add one sample to every window of the ladder."""
+        for level in self._levels:
+            level.update(x)
+        self._n += 1
+
+    def window(self, q: float) -> int:
+        """Size of the window selected for quantile ``q`` (0 when empty)."""
+        best = self._select(q)
+        return self._levels[best].maxlen if best >= 0 else 0
+
+    def value(self, q: float) -> float:
+        """Return the q-quantile of the selected window (inf when empty)."""
+        best = self._select(q)
+        return self._levels[best].value(q) if best >= 0 else math.inf
+
+    def _select(self, q: float) -> int:
+        levels = self._levels
+        psi = self._psi
+        n = self._n
+        # Only full windows are candidates (the largest once it has any data)
+        usable = [i for i, level in enumerate(levels) if level.maxlen <= n]
+        if not usable:
+            return len(levels) - 1 if n else -1
+        best = -1
+        best_cost = math.inf
+        for i in usable:
+            estimate = levels[i].value(q)
+            phi = 0.0
+            for j in usable:
+                if j >= i:
+                    break
+                excess = abs(levels[j].cdf(estimate) - q) - psi[j]
+                if excess > phi:
+                    phi = excess
+            cost = psi[i] + phi
+            if cost <= best_cost:  # ties prefer the longer window
+                best_cost = cost
+                best = i
+        return best
+
+
+class SubWindowQuantile:
+    """Approximate rolling quantiles: the mean of per-sub-window quantiles.
+
+    The window of ``maxlen`` samples is split into ``n_sub`` consecutive
+    sub-windows. Only the newest (open) sub-window keeps its samples; when it
+    fills, its quantiles for the tracked ``qs`` are stored and the samples are
+    dropped, and the oldest stored summary falls off. ``value(q)`` averages the
+    stored summaries (the open sub-window is used alone until the first one
+    closes). ``n_sub`` is an upper bound: it is lowered so every sub-window is
+    large enough to resolve the highest tracked quantile. Memory is
+    O(maxlen / n_sub + n_sub * len(qs)) and updates cost
+    O(log(maxlen / n_sub)), at the price of an approximate answer.
+    """
+
+    def __init__(self, maxlen: int, qs: Iterable[float], n_sub: int = 32) -> None:
+        if maxlen < 1:  # pragma: no cover - guard
+            raise ValueError("maxlen must be >= 1")
+        self.maxlen = maxlen
+        self.qs: Tuple[float, ...] = tuple(sorted(set(qs)))
+        if not self.qs:
+            raise ValueError("at least one quantile is required")
+        # Small-sample quantiles of a tail are biased low (the 0.99 quantile of
+        # 15 normal samples averages ~1.65 sigma instead of 2.33), so each
+        # sub-window must hold ~10/(1-q) samples for the highest tracked q;
+        # fewer, larger sub-windows are used when the window is too small.
+        min_sub = math.ceil(10 / (1 - max(self.qs)))
+        self.n_sub = max(1, min(n_sub, maxlen // min_sub))
+        self.sub_size = max(1, maxlen // self.n_sub)
+        self._open: List[float] = []
+        self._closed: Deque[Tuple[float, ...]] = deque(maxlen=self.n_sub)
+        # Running sum of each tracked quantile over the closed summaries
+        self._sums: Dict[float, float] = {q: 0.0 for q in self.qs}
+
+    def __len__(self) -> int:
+        return min(self.maxlen, len(self._closed) * self.sub_size + len(self._open))
+
+    def update(self, x: float) -> None:
+        """Add one sample, closing the open sub-window when it is full."""
+        data = self._open
+        insort(data, x)
+        if len(data) < self.sub_size:
+            return
+        summary = tuple(_sorted_quantile(data, q) for q in self.qs)
+        closed = self._closed
+        sums = self._sums
+        if len(closed) == closed.maxlen:
+            for q, old in zip(self.qs, closed[0]):
+                sums[q] -= old
+        closed.append(summary)
+        for q, v in zip(self.qs, summary):
+            sums[q] += v
+        self._open = []
+
+    def value(self, q: float) -> float:
+        """Return the approximate q-quantile (``q`` must be one of ``qs``)."""
+        if q not in self._sums:
+            raise KeyError(f"quantile {q} is not tracked (tracked: {self.qs})")
+        if not self._closed:
+            return _sorted_quantile(self._open, q)
+        return self._sums[q] / len(self._closed)
+
+
+def _sorted_quantile(data: List[float], q: float) -> float:
+    """Linearly interpolated q-quantile of already sorted ``data`` (inf if empty)."""
+    if not data:
+        return math.inf
+    if len(data) == 1:
+        return data[0]
+    position = q * (len(data) - 1)
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return data[lower]
+    fraction = position - lower
+    return data[lower] + (data[upper] - data[lower]) * fraction
+
+
+__all__ = ["AdaptiveQuantile", "P2Quantile", "SubWindowQuantile", "WindowQuantile"]
@@ -1,15 +1,21 @@
 import json
 import math
 import heapq
+import os
+import pickle
+import secrets
 from collections import Counter
 from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Mapping, Tuple, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Tuple, Optional
 
 from .config import LEVEL_BONUS, ScoringConfig
 from .templates import to_template
 from .tokenize import tokens
 
+# Snapshot paths with these suffixes are saved/loaded with pickle instead of JSON
+PICKLE_SUFFIXES = (".pkl", ".pickle")
+
 
 @dataclass
 class LineScore:
@@ -59,6 +65,38 @@ class InfoModel:
     def _self_info(prob: float) -> float:
         return -math.log2(max(prob, 1e-12))
 
+    def _token_probs(self, toks: List[str]) -> List[float]:
+        """Smoothed probability of each token, computed as one batch.
+
+        Equivalent to ``_prob(count, total_tokens, vocab)`` per token, but the
+        shared denominator and bound lookups are computed once per call
+        instead of through a method call per token.
+        """
+        g = self.g
+        alpha = self.cfg.alpha
+        denom = self.total_tokens * g + alpha * max(1, len(self.token_counts))
+        get = self.token_counts.get
+        return [(get(tok, 0.0) * g + alpha) / denom for tok in toks]
+
+    def _mean_token_info(self, toks: List[str]) -> float:
+        """Average self-information (bits) of ``toks``.
+
+        ``-log2(num / denom)`` is rewritten as ``log2(denom) - log2(num)`` with
+        ``log2(denom)`` taken once per line. When even an unseen token's
+        probability (``alpha / denom``) could hit the 1e-12 clamp, fall back to
+        the clamped per-token form so results stay identical.
+        """
+        if not toks:
+            return 0.0
+        g = self.g
+        alpha = self.cfg.alpha
+        denom = self.total_tokens * g + alpha * max(1, len(self.token_counts))
+        log2 = math.log2
+        if alpha < 1e-12 * denom:
+            return sum([-log2(max(p, 1e-12)) for p in self._token_probs(toks)]) / len(toks)
+        get = self.token_counts.get
+        return log2(denom) - sum([log2(get(tok, 0.0) * g + alpha) for tok in toks]) / len(toks)
+
     def _decay_maybe(self) -> None:
         """Apply lazy decay by updating global scale factor only."""
         if self._seen_lines == 0:
@@ -137,6 +175,32 @@ class InfoModel:
             split_camel=self.cfg.split_camel,
             split_dot=self.cfg.split_dot,
         )
+        self._observe_parts(tpl, toks)
+
+    def observe_many(self, lines: Iterable[str]) -> int:
+        """Observe each line in order; same result as calling ``observe`` per line.
+
+        Config lookups and bound methods are resolved once for the batch rather
+        than per line. Returns the number of lines observed.
+        """
+        cfg = self.cfg
+        max_len = cfg.max_line_length
+        include_bigrams, split_camel, split_dot = cfg.include_bigrams, cfg.split_camel, cfg.split_dot
+        observe_parts = self._observe_parts
+        n = 0
+        for line in lines:
+            if len(line) > max_len:
+                line = line[:max_len]
+                self.lines_truncated += 1
+            observe_parts(
+                to_template(line),
+                tokens(line, include_bigrams=include_bigrams, split_camel=split_camel, split_dot=split_dot),
+            )
+            n += 1
+        return n
+
+    def _observe_parts(self, tpl: str, toks: List[str]) -> None:
+        """Update counts from an already templated/tokenized line."""
         if len(toks) > self.cfg.max_tokens_per_line:
             # Keep only first N tokens; drop remainder
             toks = toks[: self.cfg.max_tokens_per_line]
@@ -154,11 +218,15 @@ class InfoModel:
         # For minimalism, we skip drop; dropping would lose novelty cues. Comment left for potential future logic.
 
         inv_g = 1.0 / self.g  # add scaled so effective increment is 1 after multiplying by g
+        # Local aliases keep the per-token loop to one dict get + set each.
+        token_counts = self.token_counts
+        get = token_counts.get
         for tok in toks:
-            self.token_counts[tok] = self.token_counts.get(tok, 0.0) + inv_g
-            self.total_tokens += inv_g
+            token_counts[tok] = get(tok, 0.0) + inv_g
+        self.total_tokens += inv_g * len(toks)
 
-        self.template_counts[tpl] = self.template_counts.get(tpl, 0.0) + inv_g
+        template_counts = self.template_counts
+        template_counts[tpl] = template_counts.get(tpl, 0.0) + inv_g
         self.total_templates += inv_g
         if len(self.template_counts) > self.cfg.max_templates:
             self._prune_templates()
@@ -176,17 +244,35 @@ class InfoModel:
             split_camel=self.cfg.split_camel,
             split_dot=self.cfg.split_dot,
         )
+        return self._score_parts(tpl, toks, level)
+
+    def observe_and_score(self, line: str, level: Optional[str] = None) -> LineScore:
+        """Observe ``line`` then score it, templating and tokenizing only once.
+
+        Equivalent to ``observe(line)`` followed by ``score(line, level)``: the
+        score reflects the post-observe counts. Lines longer than
+        ``max_line_length`` fall back to the two-step path because observe
+        tokenizes the truncated line while score uses the full one.
+        """
+        if len(line) > self.cfg.max_line_length:
+            self.observe(line)
+            return self.score(line, level=level)
+        tpl = to_template(line)
+        toks = tokens(
+            line,
+            include_bigrams=self.cfg.include_bigrams,
+            split_camel=self.cfg.split_camel,
+            split_dot=self.cfg.split_dot,
+        )
+        self._observe_parts(tpl, toks)
+        return self._score_parts(tpl, toks, level)
+
+    def _score_parts(self, tpl: str, toks: List[str], level: Optional[str]) -> LineScore:
         if not toks:
             return LineScore(0.0, 0.0, 0.0, 0.0, 0.0, tpl, toks)
 
         # Token self-information (average)
-        vocab = len(self.token_counts)
-        token_info_total = 0.0
-        for tok in toks:
-            count = self.token_counts.get(tok, 0.0)
-            prob = self._prob(count, self.total_tokens, vocab)
-            token_info_total += self._self_info(prob)
-        token_info = token_info_total / max(1, len(toks))
+        token_info = self._mean_token_info(toks)
 
         # Template self-information
         tvocab = len(self.template_counts)
@@ -205,16 +291,24 @@ class InfoModel:
         )
         return LineScore(score_value, token_info, template_info, level_bonus, novelty, tpl, toks)
 
-    def token_surprisals(self, toks: List[str]) -> List[Tuple[str, float, float, int]]:
-        """Return (token, probability, surprisal bits, frequency in line)."""
-        vocab = len(self.token_counts)
+    def token_surprisals(
+        self, toks: List[str], limit: Optional[int] = None
+    ) -> List[Tuple[str, float, float, int]]:
+        """Return (token, probability, surprisal bits, frequency in line).
+
+        Sorted by surprisal (desc) then token. With ``limit`` only the first
+        ``limit`` entries are returned, selected with a heap instead of a full
+        sort (same result as slicing the full list).
+        """
         counts = Counter(toks)
-        details = []
-        for tok, freq in counts.items():
-            count = self.token_counts.get(tok, 0.0)
-            prob = self._prob(count, self.total_tokens, vocab)
-            details.append((tok, prob, self._self_info(prob), freq))
-        details.sort(key=lambda item: (-item[2], item[0]))
+        uniq = list(counts)
+        probs = self._token_probs(uniq)
+        log2 = math.log2
+        details = [(tok, p, -log2(max(p, 1e-12)), counts[tok]) for tok, p in zip(uniq, probs)]
+        key = lambda item: (-item[2], item[0])  # noqa: E731
+        if limit is not None and limit < len(details):
+            return heapq.nsmallest(max(0, limit), details, key=key)
+        details.sort(key=key)
         return details
 
     def template_probability(self, tpl: str) -> float:
@@ -226,12 +320,17 @@ class InfoModel:
     # Persistence helpers -------------------------------------------------
 
     def snapshot(self) -> Dict[str, Any]:
-        """Return a JSON-serialisable snapshot of the current model state."""
+        """Return a JSON-serialisable snapshot of the current model state.
+
+        The count maps are copied (a single C-level ``dict`` copy each), so the
+        snapshot can be serialised on a background thread while the owning
+        thread keeps observing lines.
+        """
         return {
             "version": 3,
             "cfg": asdict(self.cfg),
-            "token_counts": self.token_counts,
-            "template_counts": self.template_counts,
+            "token_counts": dict(self.token_counts),
+            "template_counts": dict(self.template_counts),
             "total_tokens": self.total_tokens,
             "total_templates": self.total_templates,
             "seen_lines": self._seen_lines,
@@ -257,11 +356,35 @@ class InfoModel:
         self.renormalizations = int(snap.get("renormalizations", 0))
 
     def save(self, path: str | Path) -> Path:
-        """Persist current state to disk as JSON."""
+        """Persist current state to disk.
+
+        JSON by default; a ``.pkl``/``.pickle`` suffix writes the same snapshot
+        with pickle (highest protocol), which is much faster for large
+        vocabularies. ``json.dump`` streams encoder chunks to the file, so the
+        document is never held as one string. The data goes to a temp file next
+        to ``path`` (a fresh name per call, so concurrent saves never share
+        one) that replaces ``path`` only once complete, so an interrupted
+        periodic snapshot never leaves a truncated state file.
+        """
         path_obj = Path(path)
         path_obj.parent.mkdir(parents=True, exist_ok=True)
-        with path_obj.open("w", encoding="utf-8") as handle:
-            json.dump(self.snapshot(), handle, indent=2)
+        tmp_path = path_obj.with_name(f"{path_obj.name}.{secrets.token_hex(4)}.tmp")
+        # O_EXCL: never write into another save's file; mode 0o666 goes
+        # through the umask like a plain open(). O_BINARY (Windows only)
+        # keeps the fd from translating newlines under the pickle bytes.
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+        fd = os.open(tmp_path, flags, 0o666)
+        try:
+            if path_obj.suffix.lower() in PICKLE_SUFFIXES:
+                with os.fdopen(fd, "wb") as bhandle:
+                    pickle.dump(self.snapshot(), bhandle, protocol=pickle.HIGHEST_PROTOCOL)
+            else:
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    json.dump(self.snapshot(), handle, indent=2)
+            os.replace(tmp_path, path_obj)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
         return path_obj
 
     @classmethod
@@ -281,8 +404,16 @@ class InfoModel:
 
     @classmethod
     def load(cls, path: str | Path, cfg_override: ScoringConfig | None = None) -> "InfoModel":
-        """Load model state from disk."""
+        """Load model state from disk.
+
+        Files with a ``.pkl``/``.pickle`` suffix are unpickled; only load
+        pickle snapshots you wrote yourself (unpickling can run arbitrary code).
+        """
         path_obj = Path(path)
-        with path_obj.open("r", encoding="utf-8") as handle:
-            snap = json.load(handle)
+        if path_obj.suffix.lower() in PICKLE_SUFFIXES:
+            with path_obj.open("rb") as bhandle:
+                snap = pickle.load(bhandle)
+        else:
+            with path_obj.open("r", encoding="utf-8") as handle:
+                snap = json.load(handle)
         return cls.from_snapshot(snap, cfg_override=cfg_override)
@@ -4,28 +4,78 @@ Initial quick-win refactor: provide a pluggable interface for emitting alerts.
 Currently used only by tail for JSONL writes; can extend later to webhook, Slack, etc.
 """
 from __future__ import annotations
-from typing import Protocol, Dict, Any, List
+import threading
+import time
+from typing import Protocol, Dict, Any, List, Optional
+
+from ..jsonutil import dumps_line
 
 class AlertSink(Protocol):  # pragma: no cover - simple protocol
     def emit(self, alert: Dict[str, Any]) -> None: ...  # noqa: D401,E701 - protocol stub
     def close(self) -> None: ...
 
 class JsonlSink:
-    def __init__(self, path: str, all_token_contributors: bool = False) -> None:
+    """Append alerts as JSON lines.
+
+    Writes go through a 64 KiB buffer and are flushed at most once per
+    ``flush_interval`` seconds instead of after every alert; a one-shot timer
+    flushes the remainder of a burst so readers never lag by more than the
+    interval. ``flush_interval=0`` restores flush-per-alert. ``close()``
+    always flushes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        all_token_contributors: bool = False,
+        flush_interval: float = 1.0,
+        buffering: int = 1 << 16,
+    ) -> None:
         self.path = path
         self.all_token_contributors = all_token_contributors
-        self._fh = open(path, "a", encoding="utf-8")
+        self.flush_interval = flush_interval
+        # Binary handle: jsonutil yields UTF-8 bytes (orjson when installed)
+        self._fh = open(path, "ab", buffering=buffering)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
 
     def emit(self, alert: Dict[str, Any]) -> None:
-        import json
-        self._fh.write(json.dumps(alert) + "\n")
-        self._fh.flush()
-
-    def close(self) -> None:  # pragma: no cover - trivial
-        try:
-            self._fh.close()
-        except Exception:
-            pass
+        data = dumps_line(alert)
+        with self._lock:
+            self._fh.write(data)
+            now = time.monotonic()
+            elapsed = now - self._last_flush
+            if elapsed >= self.flush_interval:
+                self._fh.flush()
+                self._last_flush = now
+            elif self._timer is None:
+                # Stream may go quiet after a burst: flush what is pending later
+                self._timer = threading.Timer(self.flush_interval - elapsed, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _timed_flush(self) -> None:
+        with self._lock:
+            self._timer = None
+            if not self._fh.closed:
+                self._fh.flush()
+                self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._fh.flush()
+            self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            try:
+                self._fh.close()
+            except Exception:
+                pass
 
 class MultiSink:
     def __init__(self, sinks: List[AlertSink]):
@@ -2,6 +2,10 @@ import os
 import time
 from typing import Iterator, Optional, Any
 
+# Read buffer for the followed file; large backlogs (--no-follow, catch-up after
+# rotation) are read in big blocks, while a live tail still gets partial reads.
+_BUFFER_SIZE = 1 << 20
+
 
 def tail(path: str, follow: bool = True, sleep_s: float = 0.25, stop_event: Optional[Any] = None, start_at_end: bool = True) -> Iterator[str]:
     """Cross-platform tail with polling (no extra deps) plus rotation/truncation handling.
@@ -27,7 +31,7 @@ def tail(path: str, follow: bool = True, sleep_s: float = 0.25, stop_event: Opti
     if st is None:  # not following, nothing to stream
         return
 
-    with open(path, "r", encoding="utf-8", errors="replace") as handle:
+    with open(path, "r", encoding="utf-8", errors="replace", buffering=_BUFFER_SIZE) as handle:
         if follow and start_at_end:
             # Start at end like traditional tail -f
             handle.seek(0, os.SEEK_END)
@@ -44,11 +48,13 @@ def tail(path: str, follow: bool = True, sleep_s: float = 0.25, stop_event: Opti
             line = handle.readline()
             if line:
                 yield line
-                position = handle.tell()
                 continue
 
             if not follow:
                 break
+            # Text-mode tell() is costly, so the resume offset is only taken at EOF
+            # (the only place it is used: truncation checks and the seek below).
+            position = handle.tell()
 
             # Polling wait
             time.sleep(sleep_s)
@@ -82,7 +88,7 @@ def tail(path: str, follow: bool = True, sleep_s: float = 0.25, stop_event: Opti
                     # Reopen file (new handle / reset position)
                     handle.close()
                 finally:
-                    handle = open(path, "r", encoding="utf-8", errors="replace")
+                    handle = open(path, "r", encoding="utf-8", errors="replace", buffering=_BUFFER_SIZE)
                     # On truncation, start at beginning; on rotation, semantics: start at end of new file
                     if truncated:
                         handle.seek(0, os.SEEK_SET)
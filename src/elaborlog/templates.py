@@ -32,6 +32,43 @@ _REPLACERS: list[Tuple[re.Pattern[str], str]] = [
 # everywhere. The CLI resets these per invocation (process scoped).
 _CUSTOM_REPLACERS: list[Tuple[re.Pattern[str], str]] = []
 _CUSTOM_ORDER: str = "before"  # 'before' (default) or 'after'
+# (required literal, pattern, replacement): when the literal is non-empty a
+# line that does not contain it cannot match, so the regex call is skipped.
+_CUSTOM_GUARDED: list[Tuple[str, re.Pattern[str], str]] = []
+
+_REGEX_META = set(".^$*+?{}[]|()\\")
+
+
+def _literal_prefix(pattern: re.Pattern[str]) -> str:
+    """Return a literal every match of ``pattern`` must start with ("" if unknown).
+
+    Deliberately conservative: only plain characters and escaped punctuation at
+    the start of the pattern count (a leading ``\\b``/``\\A`` is skipped), a
+    character followed by a quantifier is dropped, and patterns using ``|``,
+    IGNORECASE or VERBOSE get no literal.
+    """
+    src = pattern.pattern
+    if pattern.flags & (re.IGNORECASE | re.VERBOSE) or "|" in src:
+        return ""
+    i, n = 0, len(src)
+    while src.startswith(("\\b", "\\A"), i):
+        i += 2
+    out: list[str] = []
+    while i < n:
+        ch = src[i]
+        if ch == "\\":
+            if i + 1 >= n or src[i + 1].isalnum() or src[i + 1].isspace():
+                break  # class/anchor/backref escape (\d, \b, \1, ...)
+            ch, step = src[i + 1], 2
+        elif ch in _REGEX_META:
+            break
+        else:
+            step = 1
+        if i + step < n and src[i + step] in "?*{":
+            break  # optional / repeated: this character is not required
+        out.append(ch)
+        i += step
+    return "".join(out)
 
 
 def set_custom_replacers(pairs: list[Tuple[re.Pattern[str], str]], order: str = "before") -> None:
@@ -46,25 +83,37 @@ def set_custom_replacers(pairs: list[Tuple[re.Pattern[str], str]], order: str =
         Whether to apply custom masks before the built-in canonicalization
         rules (default) or after.
     """
-    global _CUSTOM_REPLACERS, _CUSTOM_ORDER
+    global _CUSTOM_REPLACERS, _CUSTOM_ORDER, _CUSTOM_GUARDED
     _CUSTOM_REPLACERS = pairs
     _CUSTOM_ORDER = order if order in {"before", "after"} else "before"
+    _CUSTOM_GUARDED = [(_literal_prefix(pattern), pattern, repl) for pattern, repl in pairs]
 
 
 def clear_custom_replacers() -> None:
     """Reset to no custom masks (mainly for tests)."""
-    global _CUSTOM_REPLACERS, _CUSTOM_ORDER
+    global _CUSTOM_REPLACERS, _CUSTOM_ORDER, _CUSTOM_GUARDED
     _CUSTOM_REPLACERS = []
     _CUSTOM_ORDER = "before"
+    _CUSTOM_GUARDED = []
 
 
 def _apply(replacers: list[Tuple[re.Pattern[str], str]], text: str) -> str:
-    log = get_logger()
     for pattern, repl in replacers:
         try:
             text = pattern.sub(repl, text)
         except Exception as exc:  # pragma: no cover - defensive; regex failures rare
-            log.warning("custom replacer failed: %s", exc)
+            get_logger().warning("custom replacer failed: %s", exc)
+    return text
+
+
+def _apply_custom(text: str) -> str:
+    for literal, pattern, repl in _CUSTOM_GUARDED:
+        if literal and literal not in text:
+            continue
+        try:
+            text = pattern.sub(repl, text)
+        except Exception as exc:  # pragma: no cover - defensive; regex failures rare
+            get_logger().warning("custom replacer failed: %s", exc)
     return text
 
 
@@ -76,8 +125,8 @@ def to_template(line: str) -> str:
     custom mask targeting digits vs the built-in <num> substitute)."""
     x = line
     if _CUSTOM_REPLACERS and _CUSTOM_ORDER == "before":
-        x = _apply(_CUSTOM_REPLACERS, x)
+        x = _apply_custom(x)
     x = _apply(_REPLACERS, x)
     if _CUSTOM_REPLACERS and _CUSTOM_ORDER == "after":
-        x = _apply(_CUSTOM_REPLACERS, x)
+        x = _apply_custom(x)
     return " ".join(x.split())
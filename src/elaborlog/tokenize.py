@@ -3,6 +3,10 @@ import re
 
 _WORD_RE = re.compile(r"[A-Za-z0-9_]+")
 
+# Candidate fragments re-scanned from the raw text for --split-dot / --split-camel
+_DOTTED_RE = re.compile(r"[A-Za-z0-9_]+(?:\.[A-Za-z0-9_]+)+")
+_CAMEL_CANDIDATE_RE = re.compile(r"[A-Za-z][A-Za-z0-9]+")
+
 _CAMEL_SPLIT_RE = re.compile(
     r"(?<!^)(?:(?=[A-Z][a-z])|(?<=[a-z])(?=[A-Z])|(?<=[A-Za-z])(?=\d)|(?<=\d)(?=[A-Za-z]))"
 )
@@ -73,7 +77,7 @@ def tokens(
 
     if split_dot and "." in text:
         # Extract dotted sequences containing letters/numbers and dots
-        for match in re.finditer(r"[A-Za-z0-9_]+(?:\.[A-Za-z0-9_]+)+", text):
+        for match in _DOTTED_RE.finditer(text):
             raw = match.group(0).lower()
             _add(raw)
             parts = [p for p in raw.split('.') if p]
@@ -83,7 +87,7 @@ def tokens(
 
     if split_camel:
         # Scan original text preserving case; then split and lowercase parts.
-        for match in re.finditer(r"[A-Za-z][A-Za-z0-9]+", text):
+        for match in _CAMEL_CANDIDATE_RE.finditer(text):
             raw = match.group(0)
             if raw.islower() or raw.isupper() or len(raw) < 4:
                 continue
@@ -78,3 +78,19 @@ def test_version_subcommand():
     proc = run_cli(["version"])  # returns elaborlog X.Y.Z
     assert proc.returncode == 0
     assert proc.stdout.lower().startswith("elaborlog ")
+
+
+def test_rank_jobs_covers_every_line_once(tmp_path):
+    log = make_log(tmp_path)
+    json_out = tmp_path / "rank.json"
+    csv_out = tmp_path / "rank.csv"
+    proc = run_cli([
+        "rank", str(log), "--jobs", "2", "--json", str(json_out), "--out", str(csv_out), "--no-color",
+    ])
+    assert proc.returncode == 0, proc.stderr
+    data = json.loads(json_out.read_text(encoding="utf-8"))
+    expected = [line for line in log.read_text(encoding="utf-8").splitlines() if line]
+    # JSON rows stay in file order across chunks
+    assert [obj["line"] for obj in data] == expected
+    rows = csv_out.read_text(encoding="utf-8").splitlines()[1:]
+    assert len(rows) == len(expected)
@@ -53,3 +53,73 @@ def test_cluster_with_mask(tmp_path):
     assert code == 0, err
     # Replacement should appear in clustered template
     assert ("<home>" in out) or ("<path>" in out)
+
+
+def test_multiple_masks_apply_in_order():
+    import re
+
+    from elaborlog.templates import clear_custom_replacers, set_custom_replacers, to_template
+
+    pairs = [(re.compile(r"user=[a-z]+"), "user=<user>"), (re.compile(r"tenant-[A-Z]{3}"), "<tenant>")]
+    line = "login ok user=alice tenant-ABC from tenant-XYZ"
+    try:
+        set_custom_replacers(pairs)
+        assert to_template(line) == "login ok user=<user> <tenant> from <tenant>"
+        # Each mask sees the previous mask's output
+        set_custom_replacers(pairs + [(re.compile(r"<tenant> from <tenant>"), "<tenants>")])
+        assert to_template(line) == "login ok user=<user> <tenants>"
+    finally:
+        clear_custom_replacers()
+
+
+def test_mask_literal_guard_matches_unguarded():
+    import re
+
+    from elaborlog import templates
+    from elaborlog.templates import _literal_prefix, clear_custom_replacers, set_custom_replacers, to_template
+
+    assert _literal_prefix(re.compile(r"apikey=[A-Za-z0-9]+")) == "apikey="
+    assert _literal_prefix(re.compile(r"\bsess[a-z0-9]{8}\b")) == "sess"
+    assert _literal_prefix(re.compile(r"ab?c")) == "a"
+    assert _literal_prefix(re.compile(r"foo|bar")) == ""
+    assert _literal_prefix(re.compile(r"user", re.IGNORECASE)) == ""
+
+    pairs = [
+        (re.compile(r"apikey=[A-Za-z0-9]+"), "apikey=<key>"),
+        (re.compile(r"\bsess[a-z0-9]{8}\b"), "<sess>"),
+        (re.compile(r"Token|Bearer"), "<auth>"),
+    ]
+    lines = ["call apikey=abc123 sessdeadbeef ok", "Bearer xyz", "nothing to mask here", ""]
+    try:
+        set_custom_replacers(pairs)
+        guarded = [to_template(line) for line in lines]
+        clear_custom_replacers()
+        expected = [" ".join(templates._apply(templates._REPLACERS, templates._apply(pairs, line)).split()) for line in lines]
+        assert guarded == expected
+    finally:
+        clear_custom_replacers()
+
+
+def test_duplicate_masks_are_ignored(tmp_path):
+    log = tmp_path / "dup.log"
+    log.write_text("User alice logged in\nUser bob logged in\n", encoding="utf-8")
+    spec = r"User [a-z]+=User <user>"
+    json_path = tmp_path / "dup.json"
+    code, _, err = run_cli(["rank", str(log), "--top", "2", "--mask", spec, "--mask", spec, "--json", str(json_path)])
+    assert code == 0, err
+    assert err.count("ignoring duplicate --mask") == 1
+    data = json.loads(json_path.read_text())
+    assert all(obj["template"] == "User <user> logged in" for obj in data)
+
+
+def test_repeated_mask_after_other_mask_still_applies(tmp_path):
+    log = tmp_path / "reorder.log"
+    log.write_text("cat dog\n", encoding="utf-8")
+    json_path = tmp_path / "reorder.json"
+    # cat->dog creates a new match for the repeated dog rule
+    args = ["rank", str(log), "--top", "1", "--mask", "dog=<pet>", "--mask", "cat=dog", "--mask", "dog=<pet>", "--json", str(json_path)]
+    code, _, err = run_cli(args)
+    assert code == 0, err
+    assert "ignoring duplicate --mask" not in err
+    data = json.loads(json_path.read_text())
+    assert data[0]["template"] == "<pet> <pet>"
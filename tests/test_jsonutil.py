@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from elaborlog import jsonutil
+
+OBJ = {"novelty": 0.5, "template": "user=<num> café", "tokens": ["a", "b"], "threshold": None}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_roundtrip_with_and_without_orjson(monkeypatch, use_orjson):
+    if use_orjson and not jsonutil.HAVE_ORJSON:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(jsonutil, "_orjson", None)
+    assert json.loads(jsonutil.dumps(OBJ, indent=True)) == OBJ
+    line = jsonutil.dumps_line(OBJ)
+    assert line.endswith(b"\n") and line.count(b"\n") == 1
+    assert json.loads(line) == OBJ
+    assert jsonutil.loads(line) == OBJ
+    with pytest.raises(ValueError):
+        jsonutil.loads(b"not json")
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_streamed_json_array_matches_whole_document(tmp_path, monkeypatch, use_orjson):
+    from elaborlog.cli import _JsonArrayWriter
+
+    if use_orjson and not jsonutil.HAVE_ORJSON:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(jsonutil, "_orjson", None)
+    for rows in ([], [OBJ], [OBJ, {"nested": {"x": [1, 2]}, "empty": {}}]):
+        path = tmp_path / "rows.json"
+        writer = _JsonArrayWriter(str(path))
+        for row in rows:
+            writer.write(row)
+        writer.close()
+        assert writer.count == len(rows)
+        assert path.read_bytes() == jsonutil.dumps(rows, indent=True)
@@ -24,3 +24,61 @@ def test_quantile_empty():
     import math
 
     assert compute_quantile(d, 0.5) == math.inf
+
+
+def test_window_quantile_matches_sorted_window():
+    import random
+
+    from elaborlog.quantiles import WindowQuantile
+
+    random.seed(3)
+    window = deque(maxlen=50)
+    wq = WindowQuantile(50)
+    assert wq.value(0.5) == compute_quantile(window, 0.5)
+    for _ in range(500):
+        x = round(random.random(), 2)  # rounding forces duplicate values
+        window.append(x)
+        wq.update(x)
+        assert len(wq) == len(window)
+        for q in (0.0, 0.5, 0.9, 0.992):
+            assert wq.value(q) == compute_quantile(window, q)
+
+
+def test_sub_window_quantile_tracks_exact_window():
+    import random
+
+    from elaborlog.quantiles import SubWindowQuantile, WindowQuantile
+
+    random.seed(5)
+    exact = WindowQuantile(2000)
+    approx = SubWindowQuantile(2000, [0.5, 0.9], n_sub=20)
+    assert approx.value(0.5) == compute_quantile(deque(), 0.5)
+    for _ in range(10000):
+        x = random.gauss(5.0, 1.0)
+        exact.update(x)
+        approx.update(x)
+    assert len(approx) == len(exact) == 2000
+    for q in (0.5, 0.9):
+        assert approx.value(q) == pytest.approx(exact.value(q), abs=0.15)
+    with pytest.raises(KeyError):
+        approx.value(0.99)
+
+
+def test_adaptive_quantile_shrinks_window_after_level_shift():
+    import random
+
+    from elaborlog.quantiles import AdaptiveQuantile
+
+    random.seed(2)
+    aq = AdaptiveQuantile(4096)
+    assert aq.value(0.9) == compute_quantile(deque(), 0.9)
+    for _ in range(6000):
+        aq.update(random.gauss(0.0, 1.0))
+    # Stationary stream: the longest window wins
+    assert aq.window(0.9) == 4096
+    assert len(aq) == 4096
+    for _ in range(300):
+        aq.update(random.gauss(5.0, 1.0))
+    # After a shift the selected window is shorter and the estimate follows
+    assert aq.window(0.9) < 4096
+    assert aq.value(0.9) > 5.0
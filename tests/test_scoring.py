@@ -52,3 +52,108 @@ def test_snapshot_roundtrip(tmp_path):
     assert restored.total_templates == pytest.approx(model.total_templates)
     assert restored._seen_lines == model._seen_lines
     assert after.score == pytest.approx(before.score)
+
+
+def test_pickle_snapshot_roundtrip(tmp_path):
+    model = InfoModel()
+    for i in range(20):
+        model.observe(f"INFO job {i % 3} done in {i}ms")
+    path = model.save(tmp_path / "state.pkl")
+    restored = InfoModel.load(path)
+    assert restored.snapshot() == model.snapshot()
+
+
+def test_observe_and_score_matches_two_step():
+    lines = [
+        "INFO user login success user=123",
+        "ERROR user login failed user=125 code=42",
+        "WARN " + "x" * 5000,
+        "INFO ok",
+    ]
+    fused, split = InfoModel(), InfoModel()
+    for raw in lines * 3:
+        _, level, message = parse_line(raw)
+        a = fused.observe_and_score(message, level=level)
+        split.observe(message)
+        b = split.score(message, level=level)
+        assert a == b
+    assert fused.token_counts == split.token_counts
+    assert fused.lines_truncated == split.lines_truncated
+    assert fused.lines_token_truncated == split.lines_token_truncated
+
+
+def test_token_info_matches_per_token_definition():
+    model = InfoModel()
+    for i in range(50):
+        model.observe(f"INFO request served user={i % 7} path=/api/v{i % 3}")
+    sc = model.score("WARN request served slowly user=3 path=/api/v9")
+    vocab = len(model.token_counts)
+    bits = [
+        model._self_info(model._prob(model.token_counts.get(tok, 0.0), model.total_tokens, vocab))
+        for tok in sc.toks
+    ]
+    assert sc.token_info == pytest.approx(sum(bits) / len(bits), rel=1e-12)
+
+
+def test_token_surprisals_limit_matches_full_sort():
+    model = InfoModel()
+    for i in range(30):
+        model.observe(f"INFO worker {i % 4} finished job=alpha stage={i % 5}")
+    toks = model.score("ERROR worker 9 crashed job=beta stage=7 retry retry").toks
+    full = model.token_surprisals(toks)
+    for limit in (0, 1, 3, len(full), len(full) + 5):
+        assert model.token_surprisals(toks, limit) == full[:limit]
+
+
+def test_observe_many_matches_observe():
+    lines = ["INFO cache hit key=a", "ERROR " + "y" * 5000, "WARN disk 91% full", ""]
+    batch, single = InfoModel(), InfoModel()
+    assert batch.observe_many(iter(lines * 4)) == len(lines) * 4
+    for raw in lines * 4:
+        single.observe(raw)
+    assert batch.snapshot() == single.snapshot()
+
+
+def test_snapshot_does_not_alias_live_counts():
+    model = InfoModel()
+    model.observe("INFO first line")
+    snap = model.snapshot()
+    model.observe("WARN second line with new tokens")
+    assert "second" not in snap["token_counts"]
+    assert len(snap["template_counts"]) == 1
+
+
+def test_save_replaces_state_atomically(tmp_path):
+    target = tmp_path / "state.json"
+    target.write_text("stale", encoding="utf-8")
+    model = InfoModel()
+    model.observe("INFO service started")
+    model.save(target)
+    assert InfoModel.load(target).snapshot() == model.snapshot()
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+
+def test_concurrent_saves_do_not_collide(tmp_path):
+    import threading
+
+    target = tmp_path / "state.json"
+    model = InfoModel()
+    for i in range(200):
+        model.observe(f"INFO request id={i} user=u{i % 7}")
+    errors = []
+
+    def _save() -> None:
+        try:
+            for _ in range(20):
+                model.save(target)
+        except Exception as exc:  # pragma: no cover - failure path
+            errors.append(exc)
+
+    threads = [threading.Thread(target=_save) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert InfoModel.load(target).snapshot() == model.snapshot()
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
@@ -0,0 +1,28 @@
+import json
+import time
+
+from elaborlog.sinks import JsonlSink
+
+
+def test_jsonl_sink_buffers_until_interval_then_flushes(tmp_path):
+    path = tmp_path / "alerts.jsonl"
+    sink = JsonlSink(str(path), flush_interval=0.2)
+    sink._last_flush = time.monotonic()  # start of a burst: inside the interval
+    sink.emit({"n": 1})
+    sink.emit({"n": 2})
+    assert path.read_text() == ""  # still buffered
+    deadline = time.time() + 2.0
+    while time.time() < deadline and not path.read_text():
+        time.sleep(0.05)
+    assert [json.loads(x)["n"] for x in path.read_text().splitlines()] == [1, 2]
+    sink.emit({"n": 3})
+    sink.close()
+    assert [json.loads(x)["n"] for x in path.read_text().splitlines()] == [1, 2, 3]
+
+
+def test_jsonl_sink_zero_interval_flushes_each_alert(tmp_path):
+    path = tmp_path / "alerts.jsonl"
+    sink = JsonlSink(str(path), flush_interval=0)
+    sink.emit({"n": 1})
+    assert json.loads(path.read_text())["n"] == 1
+    sink.close()
@@ -39,3 +39,19 @@ def test_summarize_cli_basic():
         assert data["alerts"] > 0
         assert isinstance(data["top_templates"], list)
         assert isinstance(data["top_tokens"], list)
+
+
+def test_summarize_skips_malformed_and_keeps_invalid_utf8(tmp_path):
+    alerts = tmp_path / "alerts.jsonl"
+    good = json.dumps({"novelty": 0.5, "score": 2.0, "template": "ok <num>"}).encode()
+    alerts.write_bytes(good + b"\nnot json\n\n" + b'{"novelty": 0.7, "score": 3.0, "template": "caf\xe9"}\n')
+    out_summary = tmp_path / "summary.json"
+    s = run(
+        ["python", "-m", "elaborlog.cli", "summarize", str(alerts), "--out", str(out_summary)],
+        stdout=PIPE, stderr=PIPE, text=True, timeout=10,
+    )
+    assert s.returncode == 0, s.stderr
+    assert s.stderr.count("skipped malformed JSON line") == 1
+    data = json.loads(out_summary.read_text())
+    assert data["alerts"] == 2
+    assert ["caf�", 1] in data["top_templates"]
@@ -0,0 +1,41 @@
+import time
+
+from elaborlog.cli import _BatchedStdout
+
+
+class _Stream:
+    def __init__(self):
+        self.buf = []
+        self.flushed = ""
+
+    def write(self, text):
+        self.buf.append(text)
+        return len(text)
+
+    def flush(self):
+        self.flushed += "".join(self.buf)
+        self.buf = []
+
+
+def test_batched_stdout_flushes_end_of_burst_without_next_alert():
+    stream = _Stream()
+    out = _BatchedStdout(stream, interval=0.2)
+    out.write("a\n")
+    out.write("b\n")
+    assert stream.flushed == ""  # still buffered
+    deadline = time.time() + 2.0
+    while time.time() < deadline and not stream.flushed:
+        time.sleep(0.05)
+    assert stream.flushed == "a\nb\n"
+    out.write("c\n")
+    out.close()
+    assert stream.flushed == "a\nb\nc\n"
+
+
+def test_batched_stdout_flushes_every_max_alerts():
+    stream = _Stream()
+    out = _BatchedStdout(stream, interval=60, max_alerts=3)
+    for ch in "abc":
+        out.write(ch)
+    assert stream.flushed == "abc"
+    out.close()